@@ -12,24 +12,26 @@ def pytest_configure(config):
     }
     config.pluginmanager.register(PlaywrightReporter())
 
-@pytest.hookimpl(hookwrapper=True)
+# tryfirst makes this the outer wrapper, so it sees the screenshot PlaywrightReporter took
+@pytest.hookimpl(hookwrapper=True, tryfirst=True)
 def pytest_runtest_makereport(item, call):
     pytest_html = item.config.pluginmanager.getplugin("html")
     outcome = yield
     report = outcome.get_result()
+    if not pytest_html:
+        return
     extra = getattr(report, "extra", [])
 
     if report.when == "call":
         xfail = hasattr(report, "wasxfail")
         if (report.skipped and xfail) or (report.failed and not xfail):
-            # Add screenshot if test failed
-            page = item.funcargs.get("page")
-            if page:
-                screenshot = page.screenshot(type="png")
-                extra.append(pytest_html.extras.image(screenshot, "Screenshot"))
+            # Reuse the reporter's screenshot instead of taking another one, so its
+            # CapturePolicy limits what failures cost
+            for artifact in getattr(report, "extras", []):
+                if isinstance(artifact, dict) and artifact.get("image"):
+                    extra.append(pytest_html.extras.image(artifact["image"], "Screenshot"))
             
             # Add test trace
             extra.append(pytest_html.extras.text(report.longrepr, "Test Trace"))
 
         report.extra = extra
-
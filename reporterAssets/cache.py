@@ -0,0 +1,119 @@
+"""
+Incremental report cache
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Keeps the results and rendered HTML fragment of every test file, keyed by a
+hash of their content. Partial runs (``--lf``, a single file, ``-k``) merge
+their results into the cached ones and only re-render the files that changed.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+MANIFEST_FILE = "manifest.json"
+MB = 1024 * 1024
+
+
+class FragmentCache:
+    def __init__(self, cache_dir, salt="", parallel_min_tests=250_000, parallel_max_mb=50, workers=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Changes to the renderer must invalidate every cached fragment
+        self.salt = salt
+        # Rendering is about as cheap as pickling the results to a worker and the
+        # HTML back, so a process pool only pays off for very large text-only renders
+        self.parallel_min_tests = parallel_min_tests
+        self.parallel_max_bytes = parallel_max_mb * MB
+        self.workers = workers
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.cache_dir / MANIFEST_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_results(self, digest):
+        try:
+            with open(self.cache_dir / f"{digest}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def digest(self, file_path, tests):
+        content = json.dumps([file_path, tests], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1((self.salt + content).encode("utf-8")).hexdigest()
+
+    def merge(self, results, rootdir):
+        """Return ``results`` merged with the cached results of tests that didn't run.
+
+        Partial runs don't reveal which tests were removed from a file, so
+        cached results are only dropped once their test file no longer exists.
+        """
+        merged = {}
+        for digest in self.manifest.values():
+            for result in self._load_results(digest):
+                merged[result["nodeid"]] = result
+        ran = set()
+        for result in results:
+            merged[result["nodeid"]] = result
+            ran.add(result["nodeid"])
+
+        rootdir = Path(rootdir)
+        return [result for nodeid, result in merged.items()
+                if nodeid in ran or (rootdir / result["file"]).exists()]
+
+    def render(self, tests_by_file, render_fn):
+        """Return the HTML fragment of every file, re-rendering only changed files."""
+        fragments, pending, manifest = {}, {}, {}
+        for file_path, tests in tests_by_file.items():
+            digest = self.digest(file_path, tests)
+            manifest[file_path] = digest
+            fragment_path = self.cache_dir / f"{digest}.html"
+            if fragment_path.exists():
+                fragments[file_path] = fragment_path.read_text(encoding="utf-8")
+            else:
+                pending[file_path] = (digest, tests)
+
+        for (file_path, (digest, tests)), html in zip(pending.items(), self._render_pending(pending, render_fn)):
+            (self.cache_dir / f"{digest}.html").write_text(html, encoding="utf-8")
+            with open(self.cache_dir / f"{digest}.json", "w", encoding="utf-8") as f:
+                json.dump(tests, f, separators=(",", ":"))
+            fragments[file_path] = html
+
+        self._save_manifest(manifest)
+        return [fragments[file_path] for file_path in tests_by_file]
+
+    def use_pool(self, tests):
+        if (self.workers or os.cpu_count() or 1) < 3:
+            return False
+        if sum(len(file_tests) for file_tests in tests) < self.parallel_min_tests:
+            return False
+        # Screenshots cost more to ship to a worker than to render in place
+        screenshot_bytes = sum(len(test.get("screenshot") or "") for file_tests in tests for test in file_tests)
+        return screenshot_bytes <= self.parallel_max_bytes
+
+    def _render_pending(self, pending, render_fn):
+        file_paths = list(pending)
+        tests = [tests for _, tests in pending.values()]
+        if len(pending) > 1 and self.use_pool(tests):
+            try:
+                with ProcessPoolExecutor(self.workers) as pool:
+                    return list(pool.map(render_fn, file_paths, tests))
+            except Exception as e:
+                print(f"Parallel rendering failed, rendering serially: {e}")
+        return list(map(render_fn, file_paths, tests))
+
+    def _save_manifest(self, manifest):
+        with open(self.cache_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        self.manifest = manifest
+
+        # Drop fragments no file refers to any more
+        live = set(manifest.values())
+        for path in self.cache_dir.iterdir():
+            if path.name != MANIFEST_FILE and path.stem not in live:
+                path.unlink()
@@ -0,0 +1,57 @@
+"""
+Failure artifact sampling
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Groups failures by error signature and only captures full screenshots for the
+first few failures of each signature. Later failures get a smaller low-quality
+JPEG or nothing, and the whole run has a budget on artifact bytes and capture time.
+"""
+import re
+import time
+from collections import Counter
+
+MB = 1024 * 1024
+
+
+def failure_signature(excinfo):
+    """Exception type plus the first line of its message with volatile parts masked."""
+    lines = str(excinfo.value).strip().splitlines()
+    message = lines[0] if lines else ""
+    message = re.sub(r"0x[0-9a-fA-F]+", "<addr>", message)
+    message = re.sub(r"\d+", "N", message)
+    return f"{excinfo.typename}: {message[:200]}"
+
+
+class CapturePolicy:
+    def __init__(self, full_per_signature=3, low_quality_per_signature=10, max_mb=100, max_seconds=120):
+        self.full_per_signature = full_per_signature
+        self.low_quality_per_signature = low_quality_per_signature
+        self.max_bytes = max_mb * MB
+        self.max_seconds = max_seconds
+        self.seen = Counter()
+        self.bytes_used = 0
+        self.seconds_used = 0.0
+
+    def capture(self, page, excinfo):
+        """Return ``(image, mime, note)``; ``note`` explains a low-quality or skipped capture."""
+        signature = failure_signature(excinfo) if excinfo else "unknown"
+        self.seen[signature] += 1
+        count = self.seen[signature]
+
+        if self.bytes_used >= self.max_bytes or self.seconds_used >= self.max_seconds:
+            return None, None, (f"Screenshot skipped: run artifact budget used up "
+                                f"({self.bytes_used / MB:.0f}MB, {self.seconds_used:.0f}s)")
+        if count > self.full_per_signature + self.low_quality_per_signature:
+            return None, None, (f"Screenshot skipped by sampling: failure #{count} with signature "
+                                f"'{signature}'")
+
+        start = time.perf_counter()
+        if count <= self.full_per_signature:
+            image, mime, note = page.screenshot(type="png"), "image/png", None
+        else:
+            # Still a full viewport capture; this saves report bytes rather than capture time
+            image, mime = page.screenshot(type="jpeg", quality=30), "image/jpeg"
+            note = f"Low-quality screenshot only: failure #{count} with signature '{signature}'"
+        self.seconds_used += time.perf_counter() - start
+        self.bytes_used += len(image)
+        return image, mime, note
@@ -0,0 +1,218 @@
+"""
+Run-to-run comparison
+~~~~~~~~~~~~~~~~~~~~~
+
+Joins the results of two runs on the pytest nodeid and classifies every test
+as a new failure, fixed, still failing or significantly slower.
+
+Usage::
+
+    python -m reporterAssets.compare reports/results.json baseline/
+"""
+import argparse
+import json
+from datetime import datetime
+from html import escape
+from pathlib import Path
+
+RESULTS_FILE = "results.json"
+FAILING = frozenset(("failed", "error"))
+
+COMPARISON_CSS = """
+        .comparison {
+            border: 1px solid var(--color-border);
+            border-radius: 5px;
+            margin: 1rem 0;
+            padding: 0.5rem 1rem;
+        }
+
+        .comparison h2 {
+            font-size: 1.1rem;
+            margin-bottom: 0.5rem;
+        }
+
+        .comparison summary {
+            cursor: pointer;
+            padding: 0.25rem 0;
+        }
+
+        .comparison table {
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 0.9em;
+            margin-bottom: 0.5rem;
+        }
+
+        .comparison td, .comparison th {
+            text-align: left;
+            padding: 0.2rem 0.5rem;
+            border-bottom: 1px solid var(--color-border);
+        }
+
+        .comparison .num {
+            text-align: right;
+            white-space: nowrap;
+        }
+
+        .comparison .new-failure {
+            color: var(--color-failed);
+        }
+
+        .comparison .fixed {
+            color: var(--color-passed);
+        }
+
+        .comparison .slower {
+            color: var(--color-flaky);
+        }
+"""
+
+
+def save_results(results, path):
+    """Write the run results to ``path``, leaving out embedded screenshots."""
+    records = [{k: v for k, v in r.items() if k != "screenshot"} for r in results]
+    payload = {"generated": datetime.now().isoformat(), "results": records}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, separators=(",", ":"))
+
+
+def load_results(path):
+    """Load saved results from a ``results.json`` file or a report directory."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / RESULTS_FILE
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    return payload["results"] if isinstance(payload, dict) else payload
+
+
+def compare_results(current, baseline, slower_ratio=0.5, slower_min_ms=500):
+    """Diff two result lists joined on nodeid.
+
+    A test counts as slower when its duration grew by more than
+    ``slower_ratio`` of the baseline duration and by at least
+    ``slower_min_ms`` milliseconds.
+    """
+    index = {r["nodeid"]: r for r in baseline if "nodeid" in r}
+
+    diff = {"new_failures": [], "fixed": [], "still_failing": [], "slower": [],
+            "added": [], "removed": []}
+    seen = set()
+    for result in current:
+        nodeid = result.get("nodeid")
+        base = index.get(nodeid)
+        if base is None:
+            diff["added"].append(result)
+            continue
+        seen.add(nodeid)
+
+        now_failing = result["status"] in FAILING
+        was_failing = base["status"] in FAILING
+        if now_failing and not was_failing:
+            diff["new_failures"].append(result)
+        elif was_failing and not now_failing and result["status"] == "passed":
+            diff["fixed"].append(result)
+        elif now_failing and was_failing:
+            diff["still_failing"].append(result)
+
+        delta = result["duration"] - base["duration"]
+        if delta >= slower_min_ms and delta > base["duration"] * slower_ratio:
+            diff["slower"].append((result, base["duration"], delta))
+
+    if len(seen) < len(index):
+        diff["removed"] = [r for nodeid, r in index.items() if nodeid not in seen]
+    diff["slower"].sort(key=lambda entry: entry[2], reverse=True)
+    return diff
+
+
+def _format_ms(ms):
+    return f"{ms:.0f}ms" if abs(ms) < 1000 else f"{ms/1000:.1f}s"
+
+
+def _status_rows(results, css_class):
+    return "".join(
+        f'<tr><td class="{css_class}">{escape(r["nodeid"])}</td><td>{r["status"]}</td></tr>'
+        for r in results
+    )
+
+
+def render_comparison(diff, baseline_label=""):
+    """Render the diff as an HTML fragment styled by ``COMPARISON_CSS``."""
+    sections = [
+        ("New failures", diff["new_failures"], "new-failure"),
+        ("Fixed", diff["fixed"], "fixed"),
+        ("Still failing", diff["still_failing"], ""),
+        ("Added", diff["added"], ""),
+        ("Removed", diff["removed"], ""),
+    ]
+
+    parts = [f'<div class="comparison"><h2>Compared with baseline {escape(str(baseline_label))}</h2>']
+    for title, results, css_class in sections:
+        open_attr = " open" if css_class == "new-failure" and results else ""
+        parts.append(f"<details{open_attr}><summary>{title} ({len(results)})</summary>")
+        if results:
+            parts.append(f"<table>{_status_rows(results, css_class)}</table>")
+        parts.append("</details>")
+
+    slower_rows = "".join(
+        f'<tr><td class="slower">{escape(r["nodeid"])}</td>'
+        f'<td class="num">{_format_ms(base_ms)}</td>'
+        f'<td class="num">{_format_ms(r["duration"])}</td>'
+        f'<td class="num">+{_format_ms(delta)}</td></tr>'
+        for r, base_ms, delta in diff["slower"]
+    )
+    parts.append(f'<details><summary>Slower ({len(diff["slower"])})</summary>')
+    if slower_rows:
+        parts.append('<table><tr><th>Test</th><th class="num">Baseline</th>'
+                     f'<th class="num">Current</th><th class="num">Delta</th></tr>{slower_rows}</table>')
+    parts.append("</details></div>")
+    return "".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two saved Playwright test runs.")
+    parser.add_argument("current", help="results.json or report directory of the current run")
+    parser.add_argument("baseline", help="results.json or report directory of the baseline run")
+    parser.add_argument("-o", "--output", default="reports/compare.html", help="HTML file to write")
+    parser.add_argument("--slower-ratio", type=float, default=0.5)
+    parser.add_argument("--slower-min-ms", type=float, default=500)
+    args = parser.parse_args(argv)
+
+    diff = compare_results(load_results(args.current), load_results(args.baseline),
+                           args.slower_ratio, args.slower_min_ms)
+    html_content = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Playwright Run Comparison</title>
+    <style>
+        :root {{
+            --color-text: #1c1c1c;
+            --color-border: #e0e0e0;
+            --color-passed: #2fb344;
+            --color-failed: #f84747;
+            --color-flaky: #b3a51f;
+        }}
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+            max-width: 980px;
+            margin: 0 auto;
+        }}
+{COMPARISON_CSS}
+    </style>
+</head>
+<body>
+    {render_comparison(diff, args.baseline)}
+</body>
+</html>
+"""
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(html_content, encoding="utf-8")
+    print(f"New failures: {len(diff['new_failures'])}, fixed: {len(diff['fixed'])}, "
+          f"still failing: {len(diff['still_failing'])}, slower: {len(diff['slower'])}")
+    print(f"Comparison written to {output}")
+
+
+if __name__ == "__main__":
+    main()
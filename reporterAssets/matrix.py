@@ -0,0 +1,172 @@
+"""
+Browser matrix
+~~~~~~~~~~~~~~
+
+Grid view of the run keyed by (test, browser): one row per test with its
+other parametrize ids, one column per browser. Cells only carry a status
+class and the duration so large matrix runs stay small and quick to browse.
+"""
+from html import escape
+
+DEFAULT_VARIANT = "default"
+
+MATRIX_CSS = """
+        .view-switch {
+            display: flex;
+            gap: 0.25rem;
+        }
+
+        .view-switch button {
+            background: none;
+            border: 1px solid var(--color-border);
+            border-radius: 4px;
+            color: var(--color-text-secondary);
+            cursor: pointer;
+            padding: 0.25rem 0.75rem;
+        }
+
+        .view-switch button.active {
+            background: var(--color-selected-bg);
+            color: var(--color-text);
+        }
+
+        .matrix-grid {
+            display: none;
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 0.9em;
+        }
+
+        .matrix-grid.active {
+            display: table;
+        }
+
+        .matrix-grid th, .matrix-grid td {
+            padding: 0.3rem 0.5rem;
+            border-bottom: 1px solid var(--color-border);
+            text-align: left;
+        }
+
+        .matrix-grid th:not(:first-child), .matrix-grid td:not(:first-child) {
+            text-align: center;
+            white-space: nowrap;
+        }
+
+        .matrix-grid .matrix-file {
+            color: var(--color-text-secondary);
+            font-size: 0.85em;
+        }
+
+        .matrix-grid td[class^="cell-"]::before {
+            margin-right: 0.35rem;
+            font-weight: 600;
+        }
+
+        .matrix-grid .cell-passed {
+            color: var(--color-passed);
+        }
+
+        .matrix-grid .cell-passed::before {
+            content: "\\2713";
+        }
+
+        .matrix-grid .cell-failed, .matrix-grid .cell-error {
+            color: var(--color-failed);
+        }
+
+        .matrix-grid .cell-failed::before, .matrix-grid .cell-error::before {
+            content: "\\2717";
+        }
+
+        .matrix-grid .cell-skipped {
+            color: var(--color-skipped);
+        }
+
+        .matrix-grid .cell-skipped::before {
+            content: "\\2013";
+        }
+
+        .matrix-grid .cell-rerun {
+            color: var(--color-flaky);
+        }
+
+        .matrix-grid .cell-rerun::before {
+            content: "\\21BB";
+        }
+"""
+
+
+def split_params(test_name, browser=None):
+    """Split ``test_x[a-chromium]`` into ``("test_x[a]", "chromium")``.
+
+    Without a known browser the full parametrize id stays on the row.
+    """
+    if not test_name.endswith("]") or "[" not in test_name:
+        return test_name, browser or DEFAULT_VARIANT
+    base, params = test_name[:-1].split("[", 1)
+    if browser:
+        parts = params.split("-")
+        if browser in parts:
+            parts.remove(browser)
+        params = "-".join(parts)
+    row_name = f"{base}[{params}]" if params else base
+    return row_name, browser or DEFAULT_VARIANT
+
+
+class ResultMatrix:
+    def __init__(self):
+        self.rows = []
+        self.variants = []
+        self._row_index = {}
+        self._variant_index = {}
+        # (row index, variant index) -> (status, duration); later attempts replace earlier ones
+        self.cells = {}
+
+    @classmethod
+    def from_results(cls, results):
+        matrix = cls()
+        for result in results:
+            test_name = result["nodeid"].split("::", 1)[1] if "::" in result["nodeid"] else result["name"]
+            row_name, variant = split_params(test_name, result.get("browser"))
+            matrix.add((result["file"], row_name), variant, result["status"], result["duration"])
+        return matrix
+
+    def add(self, row, variant, status, duration):
+        row_index = self._row_index.get(row)
+        if row_index is None:
+            row_index = self._row_index[row] = len(self.rows)
+            self.rows.append(row)
+        variant_index = self._variant_index.get(variant)
+        if variant_index is None:
+            variant_index = self._variant_index[variant] = len(self.variants)
+            self.variants.append(variant)
+        self.cells[row_index, variant_index] = (status, duration)
+
+    def render(self):
+        """Render the grid view, or an empty string for single-browser runs."""
+        if len(self.variants) < 2:
+            return ""
+
+        header = "".join(f"<th>{escape(variant)}</th>" for variant in self.variants)
+        rows = []
+        for row_index, (file_path, name) in enumerate(self.rows):
+            statuses = set()
+            row_cells = []
+            for variant_index in range(len(self.variants)):
+                cell = self.cells.get((row_index, variant_index))
+                if cell is None:
+                    row_cells.append("<td>-</td>")
+                    continue
+                status, duration = cell
+                statuses.add(status)
+                duration_text = f"{duration:.0f}ms" if duration < 1000 else f"{duration/1000:.1f}s"
+                row_cells.append(f'<td class="cell-{escape(status)}" title="{escape(status)}">{duration_text}</td>')
+            rows.append(f'<tr class="matrix-row" data-statuses="{escape(" ".join(sorted(statuses)))}">'
+                        f'<td>{escape(name)} <span class="matrix-file">{escape(file_path)}</span></td>{"".join(row_cells)}</tr>')
+
+        return f"""
+        <table class="matrix-grid" id="matrixGrid">
+            <tr><th>Test</th>{header}</tr>
+            {"".join(rows)}
+        </table>
+        """
@@ -0,0 +1,207 @@
+"""
+Memory growth tracking
+~~~~~~~~~~~~~~~~~~~~~~
+
+Samples the process RSS before and after every test (and optionally the top
+tracemalloc allocation sites), attributes the growth to the test and flags
+tests whose growth is still held by the process later in the run.
+"""
+import os
+import sys
+import tracemalloc
+from html import escape
+
+import pytest
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+TIMELINE_POINTS = 1000
+
+MEMORY_CSS = """
+        .memory {
+            border: 1px solid var(--color-border);
+            border-radius: 5px;
+            margin: 1rem 0;
+            padding: 0.5rem 1rem;
+        }
+
+        .memory summary {
+            cursor: pointer;
+            font-weight: 600;
+            padding: 0.25rem 0;
+        }
+
+        .memory-timeline {
+            width: 100%;
+            height: 120px;
+            margin: 0.5rem 0;
+        }
+
+        .memory-timeline polyline {
+            fill: none;
+            stroke: var(--color-skipped);
+            stroke-width: 1.5;
+            vector-effect: non-scaling-stroke;
+        }
+
+        .memory-timeline circle {
+            fill: var(--color-failed);
+        }
+
+        .memory table {
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 0.85em;
+        }
+
+        .memory td, .memory th {
+            text-align: left;
+            padding: 0.2rem 0.5rem;
+            border-bottom: 1px solid var(--color-border);
+            vertical-align: top;
+        }
+
+        .memory .num {
+            text-align: right;
+            white-space: nowrap;
+        }
+
+        .memory .allocations {
+            color: var(--color-text-secondary);
+            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+            font-size: 0.9em;
+            white-space: pre;
+        }
+"""
+
+
+def _rss_reader():
+    if sys.platform.startswith("linux"):
+        page_size = os.sysconf("SC_PAGE_SIZE")
+
+        def read_statm():
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * page_size
+        return read_statm
+    if psutil is not None:
+        process = psutil.Process()
+        return lambda: process.memory_info().rss
+    return None
+
+
+class MemoryTracker:
+    def __init__(self, tracemalloc_top=0, leak_threshold_mb=1, top_leakers=20):
+        self.tracemalloc_top = tracemalloc_top
+        self.leak_threshold = leak_threshold_mb * MB
+        self.top_leakers = top_leakers
+        self.read_rss = _rss_reader()
+        # One (nodeid, rss_before, rss_after, allocations) tuple per test, in run order
+        self.samples = []
+        # Only stop tracemalloc at the end if this plugin was the one that started it
+        self.started_tracemalloc = False
+        if self.read_rss is None:
+            print("Memory tracking needs Linux or psutil, disabling it for this run")
+
+    def pytest_configure(self, config):
+        if self.tracemalloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def pytest_unconfigure(self, config):
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if self.read_rss is None:
+            yield
+            return
+
+        snapshot = tracemalloc.take_snapshot() if self.tracemalloc_top else None
+        before = self.read_rss()
+        yield
+        after = self.read_rss()
+
+        allocations = None
+        if snapshot is not None:
+            stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            allocations = [f"{stat.size_diff / 1024:+.0f}KB {stat.traceback}"
+                           for stat in stats[:self.tracemalloc_top] if stat.size_diff > 0]
+        self.samples.append((item.nodeid, before, after, allocations))
+
+    def analyze(self):
+        """Return ``(growth, retained)`` per sample.
+
+        Retained is the part of a test's growth the process still held at its
+        lowest point for the rest of the run.
+        """
+        lowest_later = float("inf")
+        retained = [0] * len(self.samples)
+        for i in range(len(self.samples) - 1, -1, -1):
+            _, before, after, _ = self.samples[i]
+            retained[i] = max(0, min(after, lowest_later) - before)
+            lowest_later = min(lowest_later, before, after)
+        return [(after - before, kept) for (_, before, after, _), kept in zip(self.samples, retained)]
+
+    def render(self):
+        if not self.samples:
+            return ""
+
+        analysis = self.analyze()
+        leakers = sorted(
+            (i for i, (_, kept) in enumerate(analysis) if kept >= self.leak_threshold),
+            key=lambda i: analysis[i][1], reverse=True,
+        )[:self.top_leakers]
+
+        rows = []
+        for i in leakers:
+            nodeid, before, _, allocations = self.samples[i]
+            growth, kept = analysis[i]
+            allocation_text = escape("\n".join(allocations)) if allocations else ""
+            rows.append(
+                f'<tr><td>{escape(nodeid)}<div class="allocations">{allocation_text}</div></td>'
+                f'<td class="num">{before / MB:.0f}MB</td><td class="num">+{growth / MB:.1f}MB</td>'
+                f'<td class="num">+{kept / MB:.1f}MB</td></tr>'
+            )
+        table = ('<table><tr><th>Test</th><th class="num">RSS before</th><th class="num">Growth</th>'
+                 f'<th class="num">Retained</th></tr>{"".join(rows)}</table>') if rows else \
+            "<p>No test retained more than the leak threshold.</p>"
+
+        first, last = self.samples[0][1], self.samples[-1][2]
+        return f"""
+        <details class="memory">
+            <summary>Memory: {first / MB:.0f}MB &rarr; {last / MB:.0f}MB over {len(self.samples)} tests, {len(leakers)} top leakers</summary>
+            {self._render_timeline(set(leakers))}
+            {table}
+        </details>
+        """
+
+    def _render_timeline(self, leakers):
+        values = [after for _, _, after, _ in self.samples]
+        low, high = min(values), max(values)
+        span = (high - low) or 1
+        # Long runs are bucketed to their per-bucket peak to keep the SVG small
+        step = max(1, -(-len(values) // TIMELINE_POINTS))
+        count = len(values)
+        points = []
+        for start in range(0, count, step):
+            peak = max(values[start:start + step])
+            points.append(f"{start / max(count - 1, 1) * 1000:.1f},{100 - (peak - low) / span * 100:.1f}")
+
+        markers = "".join(
+            f'<circle cx="{i / max(count - 1, 1) * 1000:.1f}" cy="{100 - (values[i] - low) / span * 100:.1f}" r="3">'
+            f'<title>{escape(self.samples[i][0])}</title></circle>'
+            for i in leakers
+        )
+        return f"""
+            <svg class="memory-timeline" viewBox="0 -5 1000 110" preserveAspectRatio="none">
+                <title>RSS after each test: {low / MB:.0f}MB - {high / MB:.0f}MB</title>
+                <polyline points="{" ".join(points)}"/>
+                {markers}
+            </svg>
+        """
@@ -0,0 +1,224 @@
+"""
+Browser performance metrics
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Collects navigation timing and paint metrics from the ``page`` fixture after
+each test, plus Chromium CDP performance counters when they are available.
+The CDP Performance domain is enabled once setup has passed, and cumulative
+counters (layouts, style recalcs, script and task time) are stored as the
+difference over the call phase.
+Metrics are stored per test as a ``{field: value}`` dict without the missing ones,
+so results saved by runs with a different set of fields still line up.
+"""
+import weakref
+from html import escape
+from statistics import median
+
+NAVIGATION_FIELDS = ("ttfb", "dom_content_loaded", "load", "first_paint", "first_contentful_paint")
+CDP_FIELDS = ("JSHeapUsedSize", "Nodes", "LayoutCount", "RecalcStyleCount", "ScriptDuration", "TaskDuration")
+# Counters that only grow while the domain is enabled; the others are point-in-time values
+CUMULATIVE_FIELDS = frozenset(("LayoutCount", "RecalcStyleCount", "ScriptDuration", "TaskDuration"))
+
+FIELD_LABELS = {
+    "ttfb": "TTFB",
+    "dom_content_loaded": "DOMContentLoaded",
+    "load": "Load",
+    "first_paint": "FP",
+    "first_contentful_paint": "FCP",
+    "JSHeapUsedSize": "JS heap",
+    "Nodes": "DOM nodes",
+    "LayoutCount": "Layouts",
+    "RecalcStyleCount": "Style recalcs",
+    "ScriptDuration": "Script",
+    "TaskDuration": "Tasks",
+}
+
+# A single evaluate() round trip; values are milliseconds relative to navigation start
+TIMING_SCRIPT = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paint = {};
+    performance.getEntriesByType('paint').forEach(p => paint[p.name] = p.startTime);
+    const round = v => (v === undefined || v === null || v <= 0) ? null : Math.round(v * 10) / 10;
+    return [
+        nav ? round(nav.responseStart - nav.requestStart) : null,
+        nav ? round(nav.domContentLoadedEventEnd) : null,
+        nav ? round(nav.loadEventEnd) : null,
+        round(paint['first-paint']),
+        round(paint['first-contentful-paint']),
+    ];
+}"""
+
+METRICS_CSS = """
+        .metrics {
+            border: 1px solid var(--color-border);
+            border-radius: 5px;
+            margin: 1rem 0;
+            padding: 0.5rem 1rem;
+        }
+
+        .metrics summary {
+            cursor: pointer;
+            font-weight: 600;
+            padding: 0.25rem 0;
+        }
+
+        .metrics table {
+            width: 100%;
+            border-collapse: collapse;
+            font-size: 0.85em;
+        }
+
+        .metrics td, .metrics th {
+            padding: 0.2rem 0.5rem;
+            border-bottom: 1px solid var(--color-border);
+            text-align: right;
+            white-space: nowrap;
+        }
+
+        .metrics td:first-child, .metrics th:first-child {
+            text-align: left;
+            white-space: normal;
+        }
+
+        .metrics .metrics-file td {
+            font-weight: 600;
+            background: var(--color-selected-bg);
+        }
+
+        .metrics .metric-outlier {
+            color: var(--color-failed);
+            font-weight: 600;
+        }
+"""
+
+
+class MetricsCollector:
+    def __init__(self, cdp=True):
+        self.cdp = cdp
+        # Cleared after the first CDP failure so later tests don't pay for it again
+        self.cdp_available = cdp
+        # One enabled CDP session per page (None for other browsers), so each test only pays for getMetrics
+        self._sessions = weakref.WeakKeyDictionary()
+        # CDP counters of each page read when its test's setup passed
+        self._baselines = weakref.WeakKeyDictionary()
+        self.fields = NAVIGATION_FIELDS + (CDP_FIELDS if cdp else ())
+
+    def start(self, page):
+        """Enable the CDP Performance domain and read the counters before the call phase."""
+        if self.cdp:
+            self._baselines[page] = self._read_counters(page)
+
+    def collect(self, page):
+        try:
+            values = page.evaluate(TIMING_SCRIPT)
+        except Exception as e:
+            print(f"Failed to collect navigation metrics: {e}")
+            return None
+
+        if self.cdp:
+            values += self._collect_cdp(page)
+        return {field: value for field, value in zip(self.fields, values) if value is not None}
+
+    def _collect_cdp(self, page):
+        counters = self._read_counters(page)
+        # Without a reading from before the call cumulative counters would cover an unknown span
+        baseline = self._baselines.pop(page, {})
+        values = []
+        for name in CDP_FIELDS:
+            value = counters.get(name)
+            if name in CUMULATIVE_FIELDS:
+                value = value - baseline[name] if value is not None and name in baseline else None
+            values.append(value)
+        return values
+
+    def _read_counters(self, page):
+        counters = {}
+        if not self.cdp_available:
+            return counters
+        try:
+            session = self._session(page)
+            if session is not None:
+                for metric in session.send("Performance.getMetrics")["metrics"]:
+                    counters[metric["name"]] = metric["value"]
+        except Exception as e:
+            print(f"Failed to collect CDP metrics, disabling them for this run: {e}")
+            self.cdp_available = False
+        return counters
+
+    def _session(self, page):
+        if page not in self._sessions:
+            session = None
+            browser = page.context.browser
+            if browser is not None and browser.browser_type.name == "chromium":
+                session = page.context.new_cdp_session(page)
+                session.send("Performance.enable")
+            self._sessions[page] = session
+        return self._sessions[page]
+
+
+def _format_value(field, value):
+    if value is None:
+        return "-"
+    if field == "JSHeapUsedSize":
+        return f"{value / (1024 * 1024):.1f}MB"
+    if field in ("ScriptDuration", "TaskDuration"):
+        return f"{value * 1000:.0f}ms"
+    if field in NAVIGATION_FIELDS:
+        return f"{value:.0f}ms"
+    return f"{value:.0f}"
+
+
+def _outlier_thresholds(results, fields):
+    # Median + 3 * MAD over the whole run, so small files still get a sensible baseline
+    thresholds = []
+    for field in fields:
+        values = [r["metrics"][field] for r in results if r["metrics"].get(field) is not None]
+        if len(values) < 4:
+            thresholds.append(None)
+            continue
+        mid = median(values)
+        mad = median(abs(v - mid) for v in values)
+        thresholds.append(mid + 3 * max(mad, mid * 0.1))
+    return thresholds
+
+
+def render_metrics(test_results, fields):
+    """Render the per-file metrics table, or an empty string without metrics."""
+    # Older saved results kept a bare list whose layout is unknown, so they are skipped
+    results = [r for r in test_results if isinstance(r.get("metrics"), dict) and r["metrics"]]
+    if not results:
+        return ""
+
+    thresholds = _outlier_thresholds(results, fields)
+    by_file = {}
+    for result in results:
+        by_file.setdefault(result["file"], []).append(result)
+
+    header = "".join(f"<th>{FIELD_LABELS.get(f, f)}</th>" for f in fields)
+    rows = []
+    for file_path, tests in by_file.items():
+        medians = []
+        for field in fields:
+            values = [t["metrics"][field] for t in tests if t["metrics"].get(field) is not None]
+            medians.append(f"<td>{_format_value(field, median(values) if values else None)}</td>")
+        rows.append(f'<tr class="metrics-file"><td>{escape(file_path)} (median of {len(tests)})</td>{"".join(medians)}</tr>')
+
+        for test in tests:
+            cells = []
+            for i, field in enumerate(fields):
+                value = test["metrics"].get(field)
+                outlier = value is not None and thresholds[i] is not None and value > thresholds[i]
+                css_class = ' class="metric-outlier"' if outlier else ""
+                cells.append(f"<td{css_class}>{_format_value(field, value)}</td>")
+            params = f' [{test["params"]}]' if test.get("params") else ""
+            rows.append(f'<tr><td>{escape(test["name"] + params)}</td>{"".join(cells)}</tr>')
+
+    return f"""
+        <details class="metrics">
+            <summary>Performance metrics</summary>
+            <table>
+                <tr><th>Test</th>{header}</tr>
+                {"".join(rows)}
+            </table>
+        </details>
+    """
@@ -0,0 +1,245 @@
+"""
+Call-phase profiler
+~~~~~~~~~~~~~~~~~~~
+
+Profiles the call phase of selected tests with either a sampling profiler or
+cProfile and stores the result as collapsed stacks (``[[stack, ms], ...]``)
+that the report renders as a flamegraph. The plugin is only registered when
+profiling is enabled, so it costs nothing otherwise.
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+try:
+    import greenlet
+except ImportError:  # only installed alongside playwright
+    greenlet = None
+
+PROFILE_KEY = pytest.StashKey()
+PLAYWRIGHT_WAIT = "(waiting on Playwright)"
+# Frames from the test runner itself are trimmed from the root of every stack
+RUNNER_PATHS = (os.sep + "_pytest" + os.sep, os.sep + "pluggy" + os.sep)
+
+FLAMEGRAPH_CSS = """
+        .flamegraph {
+            margin-top: 1rem;
+            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+            font-size: 11px;
+        }
+
+        .flame-node {
+            display: flex;
+            flex-direction: column;
+            min-width: 0;
+        }
+
+        .flame-label {
+            height: 18px;
+            line-height: 18px;
+            padding: 0 3px;
+            margin: 0 1px 1px 0;
+            overflow: hidden;
+            white-space: nowrap;
+            text-overflow: ellipsis;
+            border-radius: 2px;
+            color: #1c1c1c;
+            cursor: pointer;
+        }
+
+        .flame-children {
+            display: flex;
+        }
+"""
+
+FLAMEGRAPH_JS = """
+        function renderFlamegraph(container) {
+            container.dataset.rendered = 'true';
+            const root = {name: 'all', value: 0, children: {}};
+            JSON.parse(container.dataset.stacks).forEach(([stack, weight]) => {
+                let node = root;
+                root.value += weight;
+                stack.split(';').forEach(frame => {
+                    node = node.children[frame] = node.children[frame] || {name: frame, value: 0, children: {}};
+                    node.value += weight;
+                });
+            });
+
+            function color(name) {
+                if (name.startsWith('(')) return 'hsl(200, 60%, 65%)';
+                let hash = 0;
+                for (const c of name) hash = (hash * 31 + c.charCodeAt(0)) | 0;
+                return `hsl(${20 + Math.abs(hash) % 40}, 80%, ${60 + Math.abs(hash) % 15}%)`;
+            }
+
+            function build(node, total, width) {
+                const el = document.createElement('div');
+                el.className = 'flame-node';
+                el.style.width = width;
+                const label = document.createElement('div');
+                label.className = 'flame-label';
+                label.style.background = color(node.name);
+                label.textContent = node.name;
+                label.title = `${node.name}\\n${node.value.toFixed(0)}ms (${(100 * node.value / total).toFixed(1)}%)`;
+                label.addEventListener('click', e => { e.stopPropagation(); draw(node === focus ? root : node); });
+                el.appendChild(label);
+                const children = document.createElement('div');
+                children.className = 'flame-children';
+                Object.values(node.children)
+                    .filter(child => child.value / total > 0.002)
+                    .sort((a, b) => b.value - a.value)
+                    .forEach(child => children.appendChild(build(child, total, `${100 * child.value / node.value}%`)));
+                el.appendChild(children);
+                return el;
+            }
+
+            let focus = root;
+            function draw(node) {
+                focus = node;
+                container.innerHTML = '';
+                container.appendChild(build(node, node.value, '100%'));
+            }
+            draw(root);
+        }
+"""
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame, leaf=None):
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    # codes is leaf-first; keep everything below the innermost runner frame
+    for i, code in enumerate(codes):
+        if any(part in code.co_filename for part in RUNNER_PATHS):
+            codes = codes[:i]
+            break
+    labels = [_frame_label(code) for code in reversed(codes)]
+    if leaf:
+        labels.append(leaf)
+    return ";".join(labels)
+
+
+class _Sampler:
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        # Playwright's sync API parks the test greenlet while it waits on the browser
+        self.test_greenlet = greenlet.getcurrent() if greenlet else None
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="reporter-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return [[stack, round(seconds * 1000, 1)] for stack, seconds in self.samples.most_common()]
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            # Ticks run late while the test thread holds the GIL, so weigh each
+            # sample by the wall time since the previous one, not the interval
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            parked = self.test_greenlet.gr_frame if self.test_greenlet is not None else None
+            if parked is not None:
+                stack = _collapse(parked, PLAYWRIGHT_WAIT)
+            else:
+                frame = sys._current_frames().get(self.thread_id)
+                stack = _collapse(frame) if frame is not None else ""
+            # An empty stack means only runner frames were on it
+            if stack:
+                self.samples[stack] += elapsed
+
+
+class _CProfile:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.profile.create_stats()
+        return stats_to_stacks(self.profile.stats)
+
+
+def stats_to_stacks(stats, max_depth=64):
+    """Approximate collapsed stacks from cProfile stats.
+
+    cProfile only records caller/callee pairs, so each function's own time is
+    attributed to the chain of its heaviest callers.
+    """
+    def label(func):
+        filename, lineno, name = func
+        return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+    def heaviest_caller(func):
+        callers = stats[func][4]
+        if not callers:
+            return None
+        return max(callers, key=lambda caller: callers[caller][3])
+
+    stacks = Counter()
+    for func, (_, _, tottime, _, _) in stats.items():
+        if tottime <= 0 or any(part in func[0] for part in RUNNER_PATHS):
+            continue
+        chain, seen, current = [], set(), func
+        while current is not None and current not in seen and len(chain) < max_depth:
+            if any(part in current[0] for part in RUNNER_PATHS):
+                break
+            seen.add(current)
+            chain.append(label(current))
+            current = heaviest_caller(current)
+        stacks[";".join(reversed(chain))] += tottime * 1000
+    return [[stack, round(ms, 1)] for stack, ms in stacks.most_common() if ms >= 0.05]
+
+
+class CallProfiler:
+    def __init__(self, mode="sample", markers=("profile",), name_pattern=None, threshold_ms=None, interval_ms=5):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Unknown profiler mode: {mode}")
+        self.mode = mode
+        self.markers = tuple(markers)
+        self.name_pattern = re.compile(name_pattern) if name_pattern else None
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+
+    def _selected(self, item):
+        if any(item.get_closest_marker(marker) for marker in self.markers):
+            return True
+        return bool(self.name_pattern and self.name_pattern.search(item.nodeid))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        selected = self._selected(item)
+        # A duration threshold can only be checked afterwards, so every test is profiled
+        if not selected and self.threshold_ms is None:
+            yield
+            return
+
+        profiler = _Sampler(self.interval) if self.mode == "sample" else _CProfile()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            yield
+        finally:
+            stacks = profiler.stop()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if stacks and (selected or elapsed_ms >= self.threshold_ms):
+                item.stash[PROFILE_KEY] = stacks
@@ -1,49 +1,225 @@
 import base64
+import hashlib
+import json
 from datetime import datetime
+from html import escape
 from pathlib import Path
-import pytest, re
+import pytest
+
+from .cache import FragmentCache
+from .capture import CapturePolicy
+from .compare import COMPARISON_CSS, RESULTS_FILE, compare_results, load_results, render_comparison, save_results
+from .matrix import MATRIX_CSS, ResultMatrix
+from .memory import MEMORY_CSS, MemoryTracker
+from .metrics import METRICS_CSS, MetricsCollector, render_metrics
+from .profiler import FLAMEGRAPH_CSS, FLAMEGRAPH_JS, PROFILE_KEY, CallProfiler
+from .tracing import TraceManager
+
+# Define status icons
+STATUS_ICONS = {
+    'passed': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polyline points="20 6 9 17 4 12"/></svg>',
+    'failed': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="18" y1="6" x2="6" y2="18"/><line x1="6" y1="6" x2="18" y2="18"/></svg>',
+    'skipped': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="10"/><line x1="12" y1="8" x2="12" y2="16"/><line x1="8" y1="12" x2="16" y2="12"/></svg>',
+    'flaky': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M10.29 3.86L1.82 18a2 2 0 0 0 1.71 3h16.94a2 2 0 0 0 1.71-3L13.71 3.86a2 2 0 0 0-3.42 0z"/><line x1="12" y1="9" x2="12" y2="13"/><line x1="12" y1="17" x2="12.01" y2="17"/></svg>'
+}
+
+
+def render_file(file_path, tests):
+    """Render the HTML fragment of one test file and its tests."""
+    file_html = f"""
+        <div class="file-item">
+            <div class="file-header">
+                <svg class="chevron" width="16" height="16" viewBox="0 0 16 16" fill="none" xmlns="http://www.w3.org/2000/svg">
+                    <path d="M6 12L10 8L6 4" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
+                </svg>
+                <span class="file-name">{file_path}</span>
+            </div>
+    """
+
+    for test in tests:
+        duration_text = f"{test['duration']:.0f}ms" if test['duration'] < 1000 else f"{test['duration']/1000:.1f}s"
+
+        # Test item
+        file_html += f"""
+            <div class="test-item">
+                <div class="test-header">
+                    <div class="test-status status-{test['status']}" data-status="{test['status']}">
+                        {STATUS_ICONS.get(test['status'], '')}
+                    </div>
+                    <div class="test-name">{test['name']}{f' <span class="test-browser">{escape(test["params"])}</span>' if test.get('params') else ''}</div>
+                    <div class="test-duration">{duration_text}</div>
+                </div>
+            </div>
+        """
+
+        # Test details (error, screenshot and profile)
+        if test['error'] or test['screenshot'] or test.get('artifact_note') or test.get('trace') or test.get('profile'):
+            file_html += f"""
+            <div class="test-details">
+        """
+            if test['error']:
+                # Format error message with syntax highlighting
+                error_text = test['error']
+                # Replace any HTML special characters
+                error_text = error_text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                # Split into lines and format
+                error_lines = error_text.split('\\n')
+                formatted_lines = []
+
+                for line in error_lines:
+                    if line.strip().startswith('E '):  # Error lines
+                        formatted_lines.append(f'<span class="error-line">{line}</span>')
+                    elif line.strip().startswith(('def ', 'class ', '@', 'async def')):  # Function/class definitions
+                        formatted_lines.append(f'<span class="def-line">{line}</span>')
+                    elif ': ' in line and any(word in line for word in ['File "', 'line ']):  # File/line references
+                        formatted_lines.append(f'<span class="file-line">{line}</span>')
+                    elif line.strip().startswith('>'):  # Code context lines
+                        formatted_lines.append(f'<span class="context-line">{line}</span>')
+                    else:
+                        formatted_lines.append(line)
+
+                formatted_error = '\\n'.join(formatted_lines)
+
+                file_html += f"""
+                <div class="error-trace">
+                    <pre><code class="language-pytb">{formatted_error}</code></pre>
+                </div>
+        """
+            if test['screenshot']:
+                file_html += f"""
+                <img class="test-screenshot" src="data:{test.get('screenshot_mime') or 'image/png'};base64,{test['screenshot']}" alt="Test failure screenshot">
+        """
+            if test.get('artifact_note'):
+                file_html += f"""
+                <div class="artifact-note">{escape(test['artifact_note'])}</div>
+        """
+            if test.get('trace'):
+                file_html += f"""
+                <div class="test-trace">
+                    Trace: <a href="{escape(test['trace'])}" download>{escape(test['trace'])}</a>
+                    &middot; open with <code>playwright show-trace {escape(test['trace'])}</code> or at <a href="https://trace.playwright.dev" target="_blank">trace.playwright.dev</a>
+                </div>
+        """
+            if test.get('profile'):
+                file_html += f"""
+                <div class="flamegraph" data-stacks="{escape(json.dumps(test['profile']))}"></div>
+        """
+            file_html += "</div>"
+
+    file_html += "</div>"
+    return file_html
+
 
 class PlaywrightReporter:
-    def __init__(self, report_dir="reports"):
+    def __init__(self, report_dir="reports", baseline=None, slower_ratio=0.5, slower_min_ms=500,
+                 collect_metrics=False, cdp_metrics=True, profile=False, profile_mode="sample",
+                 profile_markers=("profile",), profile_pattern=None, profile_threshold_ms=None,
+                 track_memory=False, tracemalloc_top=0, leak_threshold_mb=1, incremental=False, render_workers=None,
+                 capture_policy=None, tracing=False):
         self.report_dir = Path(report_dir)
         self.report_dir.mkdir(exist_ok=True)
         self.test_results = []
         self.start_time = datetime.now()
+        # Decides which failures get a full screenshot, a low-quality one or nothing
+        self.capture_policy = capture_policy or CapturePolicy()
+        # Trace chunks are recorded for every test but only written for failures and retries
+        self.tracing = TraceManager(self.report_dir / "traces") if tracing else None
+        # Optional results.json (or report directory) of a previous run to diff against
+        self.baseline = baseline
+        self.slower_ratio = slower_ratio
+        self.slower_min_ms = slower_min_ms
+        # Browser performance metrics are opt-in, they cost a round trip to the page per test
+        self.metrics = MetricsCollector(cdp=cdp_metrics) if collect_metrics else None
+        self.profile_markers = tuple(profile_markers)
+        self.profiler = CallProfiler(profile_mode, self.profile_markers, profile_pattern, profile_threshold_ms) if profile else None
+        self.memory = MemoryTracker(tracemalloc_top, leak_threshold_mb) if track_memory else None
+        # Incremental mode keeps results and fragments of files that didn't run in this session
+        self.cache = FragmentCache(self.report_dir / ".cache", hashlib.sha1(Path(__file__).read_bytes()).hexdigest(),
+                                   workers=render_workers) if incremental else None
+
+    def pytest_configure(self, config):
+        # Markers stay known with profiling off, so marked tests still pass --strict-markers
+        for marker in self.profile_markers:
+            config.addinivalue_line("markers", f"{marker}: profile the call phase of this test in the HTML report")
+
+        # Optional collectors are separate plugins so that their hooks don't exist at all when they are off
+        if self.profiler:
+            config.pluginmanager.register(self.profiler, "playwright-reporter-profiler")
+        if self.memory:
+            config.pluginmanager.register(self.memory, "playwright-reporter-memory")
+        if self.tracing:
+            config.pluginmanager.register(self.tracing, "playwright-reporter-tracing")
 
     @pytest.hookimpl(hookwrapper=True)
     def pytest_runtest_makereport(self, item, call):
         outcome = yield
         report = outcome.get_result()
+
+        if report.when == "setup" and self.tracing:
+            if report.passed:
+                self.tracing.start(item)
+            else:
+                trace = self.tracing.stop(item, keep=report.failed)
+                if trace:
+                    report.trace = trace.relative_to(self.report_dir).as_posix()
+
+        if report.when == "setup" and report.passed and self.metrics:
+            page = item.funcargs.get('page', None)
+            if page:
+                self.metrics.start(page)
+
+        if report.when != "teardown" and hasattr(item, 'callspec'):
+            report.browser_name = item.callspec.params.get('browser_name')
+
+        if report.when == "call" and self.metrics:
+            page = item.funcargs.get('page', None)
+            if page:
+                report.metrics = self.metrics.collect(page)
+
+        if report.when == "call" and self.profiler:
+            report.profile = item.stash.get(PROFILE_KEY, None)
         
         if report.when == "call" and report.failed:
             try:
                 page = item.funcargs.get('page', None)
                 if page:
-                    screenshot = page.screenshot(type='png')
-                    report.extras = [{'image': screenshot}]
+                    screenshot, mime, report.artifact_note = self.capture_policy.capture(page, call.excinfo)
+                    if screenshot:
+                        report.extras = [{'image': screenshot, 'mime': mime}]
             except Exception as e:
                 print(f"Failed to capture screenshot: {e}")
 
+        if report.when == "call" and self.tracing:
+            trace = self.tracing.stop(item, keep=report.failed or getattr(item, "execution_count", 1) > 1)
+            if trace:
+                report.trace = trace.relative_to(self.report_dir).as_posix()
+
     def pytest_runtest_logreport(self, report):
-        if report.when == "call":
+        # Setup failures never reach the call phase, so they are listed from their setup report
+        if report.when == "call" or (report.when == "setup" and report.failed):
             file_path, test_name = report.nodeid.split("::", 1) if "::" in report.nodeid else (report.nodeid, "")
             
-            # Remove any pytest markers from test name (including browser tags)
-            test_name = re.sub(r'\s*\[[^\]]+\]\s*', ' ', test_name).strip()
+            # Keep the parametrize id (including the browser) apart from the test name
+            test_name, _, params = test_name.partition("[")
+            params = params[:-1] if params else None
             
             # Get screenshot from extras if test failed
             screenshot = None
+            screenshot_mime = None
             if hasattr(report, 'extras'):
                 for extra in report.extras:
                     if extra.get('image'):
                         try:
                             screenshot = base64.b64encode(extra['image']).decode('utf-8')
+                            screenshot_mime = extra.get('mime', 'image/png')
                         except Exception as e:
                             print(f"Failed to encode screenshot: {e}")
 
             # Determine test status
             status = report.outcome
-            if report.outcome == "error":
+            if report.when == "setup":
+                status = "error"  # A fixture failed before the test body ran
+            elif report.outcome == "error":
                 # Check if it's a test failure or an error
                 if hasattr(report, 'wasxfail'):
                     status = "skipped"  # Expected failure
@@ -53,17 +229,28 @@ class PlaywrightReporter:
                     status = "error"  # Other types of errors
 
             test_result = {
+                "nodeid": report.nodeid,
                 "file": file_path,
                 "name": test_name,
+                "params": params,
+                "browser": getattr(report, 'browser_name', None),
                 "status": status,
                 "duration": report.duration * 1000,  # Convert to milliseconds
                 "error": str(report.longrepr) if report.failed or report.outcome == "error" else None,
-                "screenshot": screenshot
+                "screenshot": screenshot,
+                "screenshot_mime": screenshot_mime,
+                "artifact_note": getattr(report, 'artifact_note', None),
+                "metrics": getattr(report, 'metrics', None),
+                "profile": getattr(report, 'profile', None),
+                "trace": getattr(report, 'trace', None)
             }
             self.test_results.append(test_result)
 
     def pytest_sessionfinish(self, session):
         duration = (datetime.now() - self.start_time).total_seconds()
+
+        if self.cache:
+            self.test_results = self.cache.merge(self.test_results, session.config.rootpath)
         
         # Count different types of test results
         passed_count = len([r for r in self.test_results if r["status"] == "passed"])
@@ -80,9 +267,29 @@ class PlaywrightReporter:
             "duration": duration
         }
 
-        self.generate_html_report(summary)
+        comparison = self._generate_comparison()
+        save_results(self.test_results, self.report_dir / RESULTS_FILE)
+        self.generate_html_report(summary, comparison)
+
+    def _generate_comparison(self):
+        if not self.baseline:
+            return ""
+        try:
+            baseline_results = load_results(self.baseline)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to load baseline results: {e}")
+            return ""
+        diff = compare_results(self.test_results, baseline_results, self.slower_ratio, self.slower_min_ms)
+        return render_comparison(diff, self.baseline)
+
+    def generate_html_report(self, summary, comparison=""):
+        matrix_html = ResultMatrix.from_results(self.test_results).render()
+        view_switch = """
+                <div class="view-switch">
+                    <button class="active" data-view="list">List</button>
+                    <button data-view="grid">Grid</button>
+                </div>""" if matrix_html else ""
 
-    def generate_html_report(self, summary):
         html_content = f"""
 <!DOCTYPE html>
 <html>
@@ -296,7 +503,10 @@ class PlaywrightReporter:
         }}
 
         .test-browser {{
+            display: inline-block;
+            margin-left: 0.4rem;
             padding: 0.1rem 0.4rem;
+            border: 1px solid var(--color-border);
             border-radius: 4px;
             background: var(--color-selected-bg);
             font-size: 0.8em;
@@ -352,6 +562,22 @@ class PlaywrightReporter:
             box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
         }}
 
+        .test-trace {{
+            margin-top: 1rem;
+            font-size: 0.9em;
+        }}
+
+        .test-trace a {{
+            color: var(--color-skipped);
+        }}
+
+        .artifact-note {{
+            margin-top: 1rem;
+            color: var(--color-text-secondary);
+            font-size: 0.9em;
+            font-style: italic;
+        }}
+
         .test-item.expanded {{
             background: var(--color-selected-bg);
         }}
@@ -431,6 +657,11 @@ class PlaywrightReporter:
         .error-message {{
             display: none;
         }}
+{COMPARISON_CSS}
+{METRICS_CSS}
+{FLAMEGRAPH_CSS}
+{MEMORY_CSS}
+{MATRIX_CSS}
     </style>
 </head>
 <body>
@@ -463,7 +694,7 @@ class PlaywrightReporter:
                     <div class="tab" data-status="skipped">
                         Skipped <span class="tab-count">{summary['skipped']}</span>
                     </div>
-                </div>
+                </div>{view_switch}
             </div>
         </div>
 
@@ -471,12 +702,21 @@ class PlaywrightReporter:
             {datetime.now().strftime('%m/%d/%Y, %I:%M:%S %p')} · Total time: {summary['duration']:.1f}s
         </div>
 
+        {comparison}
+
+        {render_metrics(self.test_results, self.metrics.fields) if self.metrics else ""}
+
+        {self.memory.render() if self.memory else ""}
+
         <div id="testResults">
             {self._generate_test_results()}
         </div>
+        {matrix_html}
     </div>
 
     <script>
+{FLAMEGRAPH_JS}
+
         // Theme handling
         const themeSwitch = document.getElementById('themeSwitch');
         const html = document.documentElement;
@@ -560,6 +800,18 @@ class PlaywrightReporter:
             const tabs = document.querySelectorAll('.tab');
             const testItems = document.querySelectorAll('.test-item');
             const fileItems = document.querySelectorAll('.file-item');
+            const matrixRows = document.querySelectorAll('.matrix-row');
+
+            // List / grid view switch, only rendered for multi-browser runs
+            document.querySelectorAll('.view-switch button').forEach(button => {{
+                button.addEventListener('click', function() {{
+                    document.querySelectorAll('.view-switch button').forEach(b => b.classList.remove('active'));
+                    this.classList.add('active');
+                    const grid = this.dataset.view === 'grid';
+                    document.getElementById('testResults').style.display = grid ? 'none' : 'block';
+                    document.getElementById('matrixGrid').classList.toggle('active', grid);
+                }});
+            }});
 
             // Initialize syntax highlighting
             document.querySelectorAll('pre code').forEach((block) => {{
@@ -583,6 +835,10 @@ class PlaywrightReporter:
 
                     file.style.display = hasVisibleTests ? 'block' : 'none';
                 }});
+
+                matrixRows.forEach(row => {{
+                    row.style.display = row.textContent.toLowerCase().includes(searchTerm) ? '' : 'none';
+                }});
             }});
 
             // Tab filtering
@@ -605,6 +861,11 @@ class PlaywrightReporter:
 
                         file.style.display = hasVisibleTests ? 'block' : 'none';
                     }});
+
+                    matrixRows.forEach(row => {{
+                        const shouldShow = status === 'all' || row.dataset.statuses.split(' ').includes(status);
+                        row.style.display = shouldShow ? '' : 'none';
+                    }});
                 }});
             }});
 
@@ -640,6 +901,8 @@ class PlaywrightReporter:
                     if (details && details.classList.contains('test-details')) {{
                         details.classList.toggle('expanded');
                         test.classList.toggle('expanded');
+                        // Flamegraphs are only built once their details are opened
+                        details.querySelectorAll('.flamegraph:not([data-rendered])').forEach(renderFlamegraph);
                     }}
                 }});
             }});
@@ -662,83 +925,6 @@ class PlaywrightReporter:
                 tests_by_file[file_path] = []
             tests_by_file[file_path].append(test)
 
-        # Define status icons
-        status_icons = {
-            'passed': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><polyline points="20 6 9 17 4 12"/></svg>',
-            'failed': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="18" y1="6" x2="6" y2="18"/><line x1="6" y1="6" x2="18" y2="18"/></svg>',
-            'skipped': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><circle cx="12" cy="12" r="10"/><line x1="12" y1="8" x2="12" y2="16"/><line x1="8" y1="12" x2="16" y2="12"/></svg>',
-            'flaky': '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M10.29 3.86L1.82 18a2 2 0 0 0 1.71 3h16.94a2 2 0 0 0 1.71-3L13.71 3.86a2 2 0 0 0-3.42 0z"/><line x1="12" y1="9" x2="12" y2="13"/><line x1="12" y1="17" x2="12.01" y2="17"/></svg>'
-        }
-
-        # Generate HTML for each file and its tests
-        html_parts = []
-        for file_path, tests in tests_by_file.items():
-            file_html = f"""
-                <div class="file-item">
-                    <div class="file-header">
-                        <svg class="chevron" width="16" height="16" viewBox="0 0 16 16" fill="none" xmlns="http://www.w3.org/2000/svg">
-                            <path d="M6 12L10 8L6 4" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
-                        </svg>
-                        <span class="file-name">{file_path}</span>
-                    </div>
-            """
-
-            for test in tests:
-                duration_text = f"{test['duration']:.0f}ms" if test['duration'] < 1000 else f"{test['duration']/1000:.1f}s"
-                
-                # Test item
-                file_html += f"""
-                    <div class="test-item">
-                        <div class="test-header">
-                            <div class="test-status status-{test['status']}" data-status="{test['status']}">
-                                {status_icons.get(test['status'], '')}
-                            </div>
-                            <div class="test-name">{test['name']}</div>
-                            <div class="test-duration">{duration_text}</div>
-                        </div>
-                    </div>
-                """
-
-                # Test details (error and screenshot)
-                if test['error'] or test['screenshot']:
-                    file_html += f"""
-                    <div class="test-details">
-                """
-                    if test['error']:
-                        # Format error message with syntax highlighting
-                        error_text = test['error']
-                        # Replace any HTML special characters
-                        error_text = error_text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        # Split into lines and format
-                        error_lines = error_text.split('\\n')
-                        formatted_lines = []
-                        
-                        for line in error_lines:
-                            if line.strip().startswith('E '):  # Error lines
-                                formatted_lines.append(f'<span class="error-line">{line}</span>')
-                            elif line.strip().startswith(('def ', 'class ', '@', 'async def')):  # Function/class definitions
-                                formatted_lines.append(f'<span class="def-line">{line}</span>')
-                            elif ': ' in line and any(word in line for word in ['File "', 'line ']):  # File/line references
-                                formatted_lines.append(f'<span class="file-line">{line}</span>')
-                            elif line.strip().startswith('>'):  # Code context lines
-                                formatted_lines.append(f'<span class="context-line">{line}</span>')
-                            else:
-                                formatted_lines.append(line)
-                        
-                        formatted_error = '\\n'.join(formatted_lines)
-                        
-                        file_html += f"""
-                        <div class="error-trace">
-                            <pre><code class="language-pytb">{formatted_error}</code></pre>
-                        </div>
-                """
-                    if test['screenshot']:
-                        file_html += f"""
-                        <img class="test-screenshot" src="data:image/png;base64,{test['screenshot']}" alt="Test failure screenshot">
-                """
-                    file_html += "</div>"
-
-            file_html += "</div>"
-            html_parts.append(file_html)
-
-        return "\n".join(html_parts) 
\ No newline at end of file
+        if self.cache:
+            return "\n".join(self.cache.render(tests_by_file, render_file))
+        return "\n".join(render_file(file_path, tests) for file_path, tests in tests_by_file.items())
@@ -0,0 +1,76 @@
+"""
+Retain-on-failure tracing
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Records a Playwright trace chunk on the browser context of every test and only
+writes it to disk when the test fails or is being retried. Tracing is started
+once per context and each test gets its own chunk, so contexts shared between
+tests are handled as well. A test's own ``context`` fixture is traced from the
+moment it is created, so failures in fixtures that use it (a login step) are
+traced too; teardown failures are not.
+"""
+import re
+import weakref
+
+import pytest
+
+TRACE_KEY = pytest.StashKey()
+
+
+class TraceManager:
+    def __init__(self, trace_dir, screenshots=True, snapshots=True, sources=True):
+        self.trace_dir = trace_dir
+        self.options = {"screenshots": screenshots, "snapshots": snapshots, "sources": sources}
+        self.started = weakref.WeakSet()
+        self.enabled = True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        outcome = yield
+        # Shared contexts have no test of their own yet; they start once setup has passed
+        if fixturedef.argname == "context" and request.scope == "function" and outcome.excinfo is None:
+            self.start(request.node, outcome.get_result())
+
+    def start(self, item, context=None):
+        if not self.enabled or TRACE_KEY in item.stash:
+            return
+        if context is None:
+            context = item.funcargs.get("context")
+        if context is None and item.funcargs.get("page") is not None:
+            context = item.funcargs["page"].context
+        if context is None:
+            return
+
+        try:
+            if context in self.started:
+                context.tracing.start_chunk()
+            else:
+                context.tracing.start(**self.options)
+                self.started.add(context)
+        except Exception as e:
+            # Most likely pytest-playwright's own --tracing is on as well
+            print(f"Failed to start tracing, disabling it for this run: {e}")
+            self.enabled = False
+            return
+        item.stash[TRACE_KEY] = context
+
+    def stop(self, item, keep):
+        """Stop the test's trace chunk and return the saved zip path if ``keep``."""
+        context = item.stash.get(TRACE_KEY, None)
+        if context is None:
+            return None
+        del item.stash[TRACE_KEY]
+
+        path = None
+        if keep:
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            name = re.sub(r"[^\w.-]+", "-", item.nodeid).strip("-")[:150]
+            attempt = getattr(item, "execution_count", 1)
+            path = self.trace_dir / (f"{name}-retry{attempt - 1}.zip" if attempt > 1 else f"{name}.zip")
+        try:
+            # Without a path the chunk is discarded and nothing is written
+            context.tracing.stop_chunk(path=path)
+        except Exception as e:
+            print(f"Failed to stop tracing: {e}")
+            return None
+        return path
@@ -0,0 +1,82 @@
+from reporterAssets.cache import FragmentCache
+
+
+def result(nodeid, status="passed", screenshot=None):
+    return {"nodeid": nodeid, "file": nodeid.split("::", 1)[0], "name": nodeid.split("::", 1)[1],
+            "status": status, "duration": 10.0, "screenshot": screenshot}
+
+
+def render(file_path, tests):
+    return f"{file_path}:" + ",".join(f"{t['name']}={t['status']}" for t in tests)
+
+
+def run(cache, results, rootdir):
+    merged = cache.merge(results, rootdir)
+    tests_by_file = {}
+    for test in merged:
+        tests_by_file.setdefault(test["file"], []).append(test)
+    return merged, cache.render(tests_by_file, render)
+
+
+def test_partial_run_keeps_cached_results(tmp_path):
+    for name in ("test_a.py", "test_b.py"):
+        (tmp_path / name).touch()
+    cache = FragmentCache(tmp_path / ".cache")
+    run(cache, [result("test_a.py::t1"), result("test_a.py::t2", "failed"), result("test_b.py::t1")], tmp_path)
+
+    # --lf style rerun of the single failure
+    merged, fragments = run(FragmentCache(tmp_path / ".cache"), [result("test_a.py::t2")], tmp_path)
+
+    assert [r["nodeid"] for r in merged] == ["test_a.py::t1", "test_a.py::t2", "test_b.py::t1"]
+    assert fragments == ["test_a.py:t1=passed,t2=passed", "test_b.py:t1=passed"]
+
+
+def test_unchanged_files_reuse_fragments(tmp_path):
+    (tmp_path / "test_a.py").touch()
+    (tmp_path / "test_b.py").touch()
+    cache = FragmentCache(tmp_path / ".cache")
+    run(cache, [result("test_a.py::t1"), result("test_b.py::t1")], tmp_path)
+
+    rendered = []
+
+    def tracking_render(file_path, tests):
+        rendered.append(file_path)
+        return render(file_path, tests)
+
+    cache = FragmentCache(tmp_path / ".cache")
+    merged = cache.merge([result("test_a.py::t1", "failed")], tmp_path)
+    cache.render({"test_a.py": merged[:1], "test_b.py": merged[1:]}, tracking_render)
+    assert rendered == ["test_a.py"]
+
+
+def test_deleted_file_is_evicted(tmp_path):
+    (tmp_path / "test_a.py").touch()
+    (tmp_path / "test_b.py").touch()
+    cache = FragmentCache(tmp_path / ".cache")
+    run(cache, [result("test_a.py::t1"), result("test_b.py::t1")], tmp_path)
+
+    (tmp_path / "test_b.py").unlink()
+    merged, fragments = run(FragmentCache(tmp_path / ".cache"), [result("test_a.py::t1")], tmp_path)
+
+    assert [r["nodeid"] for r in merged] == ["test_a.py::t1"]
+    assert fragments == ["test_a.py:t1=passed"]
+    # manifest plus one results file and one fragment for test_a.py
+    assert len(list((tmp_path / ".cache").iterdir())) == 3
+
+
+def test_salt_invalidates_fragments(tmp_path):
+    tests = [result("test_a.py::t1")]
+    assert FragmentCache(tmp_path, salt="1").digest("test_a.py", tests) != \
+        FragmentCache(tmp_path, salt="2").digest("test_a.py", tests)
+
+
+def test_pool_only_for_large_text_renders(tmp_path):
+    cache = FragmentCache(tmp_path, parallel_min_tests=100, parallel_max_mb=1, workers=4)
+    small = [[result(f"test_a.py::t{i}") for i in range(50)]]
+    large = [[result(f"test_a.py::t{i}") for i in range(100)]]
+    heavy = [[result(f"test_a.py::t{i}", screenshot="A" * 20_000) for i in range(100)]]
+
+    assert not cache.use_pool(small)
+    assert cache.use_pool(large)
+    assert not cache.use_pool(heavy)
+    assert not FragmentCache(tmp_path, parallel_min_tests=100, workers=1).use_pool(large)
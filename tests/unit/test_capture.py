@@ -0,0 +1,41 @@
+from reporterAssets.capture import CapturePolicy, failure_signature
+
+
+class FakeExcinfo:
+    def __init__(self, message, typename="TimeoutError"):
+        self.value = Exception(message)
+        self.typename = typename
+
+
+class FakePage:
+    def __init__(self):
+        self.calls = []
+
+    def screenshot(self, **kwargs):
+        self.calls.append(kwargs)
+        return b"x" * 100
+
+
+def test_signature_masks_volatile_parts():
+    assert failure_signature(FakeExcinfo("Timeout 30000ms exceeded at 0xdeadbeef\ncall log")) == \
+        "TimeoutError: Timeout Nms exceeded at <addr>"
+
+
+def test_capture_tiers_per_signature():
+    page, policy = FakePage(), CapturePolicy(full_per_signature=1, low_quality_per_signature=1)
+    results = [policy.capture(page, FakeExcinfo(f"Timeout {i}ms exceeded")) for i in range(3)]
+
+    assert [mime for _, mime, _ in results] == ["image/png", "image/jpeg", None]
+    assert results[1][2].startswith("Low-quality screenshot only")
+    assert results[2][2].startswith("Screenshot skipped by sampling")
+    assert len(page.calls) == 2
+
+    # A different signature starts over with full captures
+    assert policy.capture(page, FakeExcinfo("net::ERR_CONNECTION_REFUSED"))[1] == "image/png"
+
+
+def test_capture_stops_at_byte_budget():
+    page, policy = FakePage(), CapturePolicy(max_mb=100 / (1024 * 1024))
+    policy.capture(page, FakeExcinfo("a"))
+    image, _, note = policy.capture(page, FakeExcinfo("b"))
+    assert image is None and note.startswith("Screenshot skipped: run artifact budget")
@@ -0,0 +1,52 @@
+from reporterAssets.compare import compare_results, load_results, render_comparison, save_results
+
+
+def result(nodeid, status="passed", duration=100.0):
+    return {"nodeid": nodeid, "status": status, "duration": duration}
+
+
+def nodeids(results):
+    return [r["nodeid"] for r in results]
+
+
+def test_classifies_status_changes():
+    baseline = [result("t::a"), result("t::b", "failed"), result("t::c", "failed"),
+                result("t::d", "error"), result("t::gone")]
+    current = [result("t::a", "failed"), result("t::b"), result("t::c", "error"),
+               result("t::d", "skipped"), result("t::new")]
+
+    diff = compare_results(current, baseline)
+
+    assert nodeids(diff["new_failures"]) == ["t::a"]
+    assert nodeids(diff["fixed"]) == ["t::b"]
+    assert nodeids(diff["still_failing"]) == ["t::c"]
+    assert nodeids(diff["added"]) == ["t::new"]
+    assert nodeids(diff["removed"]) == ["t::gone"]
+
+
+def test_slower_needs_both_ratio_and_absolute_delta():
+    baseline = [result("t::ratio_only", duration=100), result("t::abs_only", duration=10_000),
+                result("t::both", duration=1_000), result("t::faster", duration=5_000)]
+    current = [result("t::ratio_only", duration=400), result("t::abs_only", duration=11_000),
+               result("t::both", duration=3_000), result("t::faster", duration=1_000)]
+
+    diff = compare_results(current, baseline, slower_ratio=0.5, slower_min_ms=500)
+
+    assert [(r["nodeid"], base, delta) for r, base, delta in diff["slower"]] == [("t::both", 1_000, 2_000)]
+
+
+def test_slower_sorted_by_delta():
+    baseline = [result(f"t::{i}", duration=1_000) for i in range(3)]
+    current = [result("t::0", duration=2_000), result("t::1", duration=9_000), result("t::2", duration=4_000)]
+    assert [r["nodeid"] for r, _, _ in compare_results(current, baseline)["slower"]] == ["t::1", "t::2", "t::0"]
+
+
+def test_saved_results_round_trip_without_screenshots(tmp_path):
+    save_results([dict(result("t::a"), screenshot="AAAA")], tmp_path / "results.json")
+    assert load_results(tmp_path) == [result("t::a")]
+
+
+def test_render_escapes_nodeids():
+    diff = compare_results([result("t::a[<b>]", "failed")], [result("t::a[<b>]")])
+    html = render_comparison(diff, "baseline")
+    assert "t::a[&lt;b&gt;]" in html and "New failures (1)" in html
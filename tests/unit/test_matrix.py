@@ -0,0 +1,53 @@
+import pytest
+
+from reporterAssets.matrix import DEFAULT_VARIANT, ResultMatrix, split_params
+
+
+@pytest.mark.parametrize("test_name, browser, expected", [
+    ("test_a", None, ("test_a", DEFAULT_VARIANT)),
+    ("test_a", "chromium", ("test_a", "chromium")),
+    ("test_a[chromium]", "chromium", ("test_a", "chromium")),
+    ("test_a[1-firefox]", "firefox", ("test_a[1]", "firefox")),
+    ("test_a[webkit-admin]", "webkit", ("test_a[admin]", "webkit")),
+    ("test_a[1-2]", None, ("test_a[1-2]", DEFAULT_VARIANT)),
+])
+def test_split_params(test_name, browser, expected):
+    assert split_params(test_name, browser) == expected
+
+
+def result(nodeid, browser, status="passed", duration=10.0):
+    file_path, test_name = nodeid.split("::", 1)
+    return {"nodeid": nodeid, "file": file_path, "name": test_name.split("[")[0],
+            "browser": browser, "status": status, "duration": duration}
+
+
+def test_one_row_per_test_across_browsers():
+    matrix = ResultMatrix.from_results([
+        result("tests/t.py::test_a[chromium]", "chromium"),
+        result("tests/t.py::test_a[firefox]", "firefox", "failed"),
+        result("tests/t.py::test_b[chromium]", "chromium"),
+    ])
+    assert matrix.rows == [("tests/t.py", "test_a"), ("tests/t.py", "test_b")]
+    assert matrix.variants == ["chromium", "firefox"]
+
+    html = matrix.render()
+    assert html.count('class="matrix-row"') == 2
+    assert 'data-statuses="failed passed"' in html
+    assert "<svg" not in html
+    assert "<td>-</td>" in html
+
+
+def test_final_attempt_replaces_rerun():
+    matrix = ResultMatrix.from_results([
+        result("tests/t.py::test_a[chromium]", "chromium", "rerun"),
+        result("tests/t.py::test_a[chromium]", "chromium", "passed"),
+        result("tests/t.py::test_a[firefox]", "firefox", "rerun"),
+    ])
+    html = matrix.render()
+    assert 'class="cell-passed"' in html
+    assert 'class="cell-rerun"' in html
+    assert "cell-error" not in html
+
+
+def test_single_browser_has_no_grid():
+    assert ResultMatrix.from_results([result("tests/t.py::test_a", None)]).render() == ""
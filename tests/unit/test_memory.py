@@ -0,0 +1,50 @@
+import tracemalloc
+
+from reporterAssets.memory import MB, MemoryTracker
+
+
+def tracker_with(samples):
+    tracker = MemoryTracker()
+    tracker.samples = [(f"test_{i}", before * MB, after * MB, None) for i, (before, after) in enumerate(samples)]
+    return tracker
+
+
+def test_transient_growth_is_not_retained():
+    tracker = tracker_with([(100, 130), (130, 100), (100, 100)])
+    assert tracker.analyze() == [(30 * MB, 0), (-30 * MB, 0), (0, 0)]
+
+
+def test_retained_growth_uses_lowest_later_sample():
+    # test_0 grows by 20MB, 5MB of it is released later on
+    tracker = tracker_with([(100, 120), (120, 125), (115, 118), (118, 118)])
+    assert [kept // MB for _, kept in tracker.analyze()] == [15, 0, 3, 0]
+
+
+def test_last_test_keeps_its_growth():
+    tracker = tracker_with([(100, 100), (100, 110)])
+    assert tracker.analyze()[-1] == (10 * MB, 10 * MB)
+
+
+def test_render_lists_top_leakers():
+    tracker = tracker_with([(100, 120), (120, 120), (120, 120.5)])
+    html = tracker.render()
+    assert "test_0" in html and "1 top leakers" in html
+
+
+def test_foreign_tracemalloc_is_left_running():
+    tracemalloc.start()
+    try:
+        tracker = MemoryTracker(tracemalloc_top=3)
+        tracker.pytest_configure(None)
+        tracker.pytest_unconfigure(None)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_own_tracemalloc_is_stopped():
+    tracker = MemoryTracker(tracemalloc_top=3)
+    tracker.pytest_configure(None)
+    assert tracemalloc.is_tracing()
+    tracker.pytest_unconfigure(None)
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,104 @@
+from reporterAssets.metrics import CDP_FIELDS, NAVIGATION_FIELDS, MetricsCollector, render_metrics
+
+
+class FakePage:
+    def __init__(self, values):
+        self.values = values
+
+    def evaluate(self, script):
+        return list(self.values)
+
+
+def result(name, metrics):
+    return {"file": "tests/test_a.py", "name": name, "params": None, "metrics": metrics}
+
+
+def test_collect_keys_values_by_field():
+    collector = MetricsCollector(cdp=False)
+    metrics = collector.collect(FakePage([12.0, 100.0, 200.0, None, 50.0]))
+    assert metrics == {"ttfb": 12.0, "dom_content_loaded": 100.0, "load": 200.0, "first_contentful_paint": 50.0}
+
+
+def test_render_mixes_results_with_different_fields():
+    results = [
+        result("test_nav_only", {"ttfb": 10.0, "load": 200.0}),
+        result("test_with_cdp", {"ttfb": 12.0, "Nodes": 300}),
+        result("test_old_format", [1.0, 2.0, 3.0, 4.0, 5.0]),
+    ]
+    html = render_metrics(results, NAVIGATION_FIELDS + CDP_FIELDS)
+    assert "test_nav_only" in html and "test_with_cdp" in html
+    assert "test_old_format" not in html
+
+
+def test_render_flags_outliers():
+    results = [result(f"test_{i}", {"load": 200.0 + i}) for i in range(6)]
+    results.append(result("test_slow", {"load": 5000.0}))
+    html = render_metrics(results, NAVIGATION_FIELDS)
+    assert html.count('class="metric-outlier"') == 1
+
+
+class FakeSession:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, method):
+        self.sent.append(method)
+        if method == "Performance.getMetrics":
+            return {"metrics": [{"name": "Nodes", "value": 42}]}
+
+
+class FakeContext:
+    def __init__(self, browser_name):
+        self.browser = type("Browser", (), {"browser_type": type("BrowserType", (), {"name": browser_name})})()
+        self.sessions = []
+
+    def new_cdp_session(self, page):
+        self.sessions.append(FakeSession())
+        return self.sessions[-1]
+
+
+def test_cdp_session_is_reused_per_page():
+    page = FakePage([None] * 5)
+    page.context = FakeContext("chromium")
+    collector = MetricsCollector()
+
+    assert collector.collect(page) == {"Nodes": 42}
+    assert collector.collect(page) == {"Nodes": 42}
+    assert len(page.context.sessions) == 1
+    assert page.context.sessions[0].sent == ["Performance.enable", "Performance.getMetrics", "Performance.getMetrics"]
+
+
+def test_cdp_is_skipped_outside_chromium():
+    page = FakePage([10.0, None, None, None, None])
+    page.context = FakeContext("firefox")
+    assert MetricsCollector().collect(page) == {"ttfb": 10.0}
+    assert page.context.sessions == []
+
+
+class CountingSession(FakeSession):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.layouts = 0
+
+    def send(self, method):
+        self.log.append(method)
+        if method == "Performance.getMetrics":
+            self.layouts += 5
+            return {"metrics": [{"name": "LayoutCount", "value": self.layouts}, {"name": "Nodes", "value": 42}]}
+
+
+def test_cumulative_counters_cover_the_call_only():
+    log = []
+    page = FakePage([None] * 5)
+    page.context = FakeContext("chromium")
+    page.context.new_cdp_session = lambda page: CountingSession(log)
+    collector = MetricsCollector()
+
+    collector.start(page)
+    log.append("call")
+    assert collector.collect(page) == {"Nodes": 42, "LayoutCount": 5}
+    assert log == ["Performance.enable", "Performance.getMetrics", "call", "Performance.getMetrics"]
+
+    # Without a reading from before the call the cumulative counters are left out
+    assert collector.collect(page) == {"Nodes": 42}
@@ -0,0 +1,43 @@
+import sys
+
+from reporterAssets.profiler import _collapse, stats_to_stacks
+
+
+def test_collapse_trims_runner_frames():
+    stack = _collapse(sys._getframe())
+    assert stack == "test_collapse_trims_runner_frames (test_profiler.py:6)"
+
+
+def test_collapse_appends_leaf():
+    stack = _collapse(sys._getframe(), "(waiting on Playwright)")
+    assert stack.endswith(";(waiting on Playwright)")
+
+
+def test_collapse_only_runner_frames_is_empty():
+    assert _collapse(None) == ""
+
+
+def test_stats_to_stacks_follows_heaviest_caller():
+    test = ("test_x.py", 1, "test_x")
+    fast = ("helpers.py", 1, "fast_path")
+    slow = ("helpers.py", 10, "slow_path")
+    leaf = ("helpers.py", 20, "leaf")
+    stats = {
+        test: (1, 1, 0.001, 0.1, {}),
+        fast: (1, 1, 0.0, 0.01, {test: (1, 1, 0.0, 0.01)}),
+        slow: (1, 1, 0.0, 0.09, {test: (1, 1, 0.0, 0.09)}),
+        leaf: (2, 2, 0.05, 0.05, {fast: (1, 1, 0.005, 0.005), slow: (1, 1, 0.045, 0.045)}),
+    }
+
+    stacks = dict(stats_to_stacks(stats))
+
+    assert stacks == {
+        "test_x (test_x.py:1);slow_path (helpers.py:10);leaf (helpers.py:20)": 50.0,
+        "test_x (test_x.py:1)": 1.0,
+    }
+
+
+def test_stats_to_stacks_survives_recursion():
+    func = ("helpers.py", 1, "recurse")
+    stats = {func: (3, 1, 0.01, 0.01, {func: (2, 2, 0.01, 0.01)})}
+    assert stats_to_stacks(stats) == [["recurse (helpers.py:1)", 10.0]]
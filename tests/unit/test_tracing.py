@@ -0,0 +1,115 @@
+import pytest
+
+from reporterAssets.tracing import TraceManager
+
+
+class FakeTracing:
+    def __init__(self, fail_start=False):
+        self.calls = []
+        self.fail_start = fail_start
+
+    def start(self, **options):
+        if self.fail_start:
+            raise RuntimeError("Tracing has been already started")
+        self.calls.append(("start", options))
+
+    def start_chunk(self):
+        self.calls.append(("start_chunk",))
+
+    def stop_chunk(self, path=None):
+        self.calls.append(("stop_chunk", path))
+
+
+class FakeContext:
+    def __init__(self, fail_start=False):
+        self.tracing = FakeTracing(fail_start)
+
+
+class FakeItem:
+    def __init__(self, nodeid, context, execution_count=None):
+        self.nodeid = nodeid
+        self.funcargs = {"context": context}
+        self.stash = pytest.Stash()
+        if execution_count is not None:
+            self.execution_count = execution_count
+
+
+def test_reused_context_starts_tracing_once_then_chunks(tmp_path):
+    tracer = TraceManager(tmp_path)
+    context = FakeContext()
+    for name in ("test_a", "test_b"):
+        item = FakeItem(f"tests/test_x.py::{name}", context)
+        tracer.start(item)
+        tracer.stop(item, keep=False)
+
+    assert [call[0] for call in context.tracing.calls] == ["start", "stop_chunk", "start_chunk", "stop_chunk"]
+    assert context.tracing.calls[0][1] == {"screenshots": True, "snapshots": True, "sources": True}
+
+
+def test_passed_chunk_is_discarded(tmp_path):
+    tracer = TraceManager(tmp_path / "traces")
+    item = FakeItem("tests/test_x.py::test_a", FakeContext())
+    tracer.start(item)
+
+    assert tracer.stop(item, keep=False) is None
+    assert item.funcargs["context"].tracing.calls[-1] == ("stop_chunk", None)
+    assert not (tmp_path / "traces").exists()
+
+
+def test_failed_chunk_is_saved_per_attempt(tmp_path):
+    tracer = TraceManager(tmp_path)
+    context = FakeContext()
+    paths = []
+    for attempt in (1, 2):
+        item = FakeItem("tests/test_x.py::test_a[chromium]", context, execution_count=attempt)
+        tracer.start(item)
+        paths.append(tracer.stop(item, keep=True))
+
+    assert [path.name for path in paths] == ["tests-test_x.py-test_a-chromium.zip",
+                                             "tests-test_x.py-test_a-chromium-retry1.zip"]
+    assert context.tracing.calls[-1] == ("stop_chunk", paths[-1])
+
+
+def test_start_failure_disables_tracing(tmp_path):
+    tracer = TraceManager(tmp_path)
+    item = FakeItem("tests/test_x.py::test_a", FakeContext(fail_start=True))
+    tracer.start(item)
+    assert not tracer.enabled
+    assert tracer.stop(item, keep=True) is None
+
+    other = FakeItem("tests/test_x.py::test_b", FakeContext())
+    tracer.start(other)
+    assert other.funcargs["context"].tracing.calls == []
+
+
+
+class FakeOutcome:
+    excinfo = None
+
+    def __init__(self, result):
+        self.result = result
+
+    def get_result(self):
+        return self.result
+
+
+def test_own_context_is_traced_from_its_creation(tmp_path):
+    tracer = TraceManager(tmp_path)
+    context = FakeContext()
+    item = FakeItem("tests/test_x.py::test_login", context)
+    fixturedef = type("FixtureDef", (), {"argname": "context"})()
+    request = type("SubRequest", (), {"node": item, "scope": "function"})()
+
+    # Driven the way pluggy drives a hookwrapper
+    hook = tracer.pytest_fixture_setup(fixturedef, request)
+    next(hook)
+    with pytest.raises(StopIteration):
+        hook.send(FakeOutcome(context))
+
+    # Starting again once setup has passed doesn't open a second chunk
+    tracer.start(item)
+    assert [call[0] for call in context.tracing.calls] == ["start"]
+
+    # A fixture failing later in setup keeps the chunk
+    path = tracer.stop(item, keep=True)
+    assert context.tracing.calls[-1] == ("stop_chunk", path)